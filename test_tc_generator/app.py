@@ -1,19 +1,40 @@
 import streamlit as st
+import hashlib
 import os
 import tempfile
 from langchain.schema import Document
 from langchain_community.document_loaders import PyMuPDFLoader, UnstructuredWordDocumentLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Alignment
-from io import BytesIO
 
 from processor import (
     filter_unnecessary_sentences,
     identify_document_structure,
     generate_testcases,
-    validate_testcase_quality
+    validate_testcase_quality,
+    regenerate_testcases,
+    merge_validation_stats
+)
+from provenance import (
+    build_provenance_index,
+    provenance_to_json,
+    select_rows,
+    expand_selection,
+    parse_row_numbers
+)
+from taxonomy import (
+    resolve_project_structure,
+    canonicalize_testcases
+)
+from preprocessor import (
+    remove_repeated_lines,
+    collapse_duplicate_chunks
+)
+from exporters import (
+    GRADES,
+    EXPORT_FORMATS,
+    filter_testcases,
+    paginate_testcases
 )
 
 st.set_page_config(page_title="게임 기획서 → Testcase 자동 생성기", layout="wide")
@@ -49,74 +70,187 @@ def split_into_sentences(documents):
     for doc in documents:
         chunks = text_splitter.split_text(doc.page_content)
         for chunk in chunks:
-            sentences.append(Document(page_content=chunk, metadata=doc.metadata))
+            # chunk_id ties generated testcases back to their source text (see provenance.py)
+            metadata = {**doc.metadata, "chunk_id": f"c{len(sentences):05d}"}
+            sentences.append(Document(page_content=chunk, metadata=metadata))
     
     return sentences
 
-def create_excel_with_testcases(testcases):
-    # Create a new workbook and select the active worksheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Testcases"
-    
-    # Define column headers
-    headers = ["항목번호", "대분류", "중분류", "소분류", "구분", "테스트 내용", "테스트 조건", "기대 결과", "비고", "점수", "등급"]
-    
-    # Set header style
-    header_fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
-    header_font = Font(bold=True)
-    
-    # Write headers
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_idx, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center')
-    
-    # Write testcase data
-    for row_idx, tc in enumerate(testcases, 2):
-        ws.cell(row=row_idx, column=1, value=row_idx-1)  # 항목번호
-        ws.cell(row=row_idx, column=2, value=tc["대분류"])
-        ws.cell(row=row_idx, column=3, value=tc["중분류"])
-        ws.cell(row=row_idx, column=4, value=tc["소분류"])
-        ws.cell(row=row_idx, column=5, value=tc["구분"])
-        ws.cell(row=row_idx, column=6, value=tc["테스트 내용"])
-        ws.cell(row=row_idx, column=7, value=tc["테스트 조건"])
-        ws.cell(row=row_idx, column=8, value=tc["기대 결과"])
-        ws.cell(row=row_idx, column=9, value=tc["비고"])
+# Function to run every pipeline stage on a saved document (shared by the UI and loadtest/harness.py)
+def run_pipeline(file_path, model_option, api_keys, local_scoring=True, notify=st.info, project=None):
+    # Load document
+    documents = load_document(file_path)
+    if not documents:
+        return None
+    
+    # Strip headers/footers repeated across pages
+    notify("페이지마다 반복되는 머리글/바닥글을 제거합니다...")
+    documents = remove_repeated_lines(documents)
+    
+    # Split into sentences
+    notify("문서를 문장 단위로 분할합니다...")
+    sentences = split_into_sentences(documents)
+    
+    # Collapse identical and near-identical chunks
+    chunk_count = len(sentences)
+    sentences = collapse_duplicate_chunks(sentences)
+    notify(f"중복 문장 {chunk_count - len(sentences)}개를 제거했습니다.")
+    
+    # Filter unnecessary sentences
+    notify("Testcase에 필요한 문장을 필터링합니다...")
+    filtered_sentences = filter_unnecessary_sentences(sentences, model_option, api_keys)
+    
+    # Identify document structure (reusing the project taxonomy when one is given)
+    notify("문서 구조를 분석하여 대/중/소분류를 식별합니다...")
+    taxonomy_stats = {}
+    if project:
+        doc_structure = resolve_project_structure(project, filtered_sentences, model_option, api_keys, stats=taxonomy_stats)
+        if taxonomy_stats["mode"] == "skipped":
+            notify("기존 프로젝트 분류체계를 그대로 사용합니다. (구조 분석 생략)")
+        elif taxonomy_stats["mode"] == "delta":
+            notify(f"새 문장 {taxonomy_stats['new_chunks']}개만 분석하여 분류 {taxonomy_stats['added_categories']}개를 추가했습니다.")
+        elif taxonomy_stats["mode"] == "delta_failed":
+            notify(f"새 문장 {taxonomy_stats['new_chunks']}개의 분류 분석에 실패하여 기존 분류체계를 사용합니다. 다음 실행 때 다시 분석합니다.")
+    else:
+        doc_structure = identify_document_structure(filtered_sentences, model_option, api_keys)
+    
+    # Generate testcases
+    notify("Testcase를 생성합니다...")
+    testcases = generate_testcases(filtered_sentences, doc_structure, model_option, api_keys)
+    if project:
+        testcases = canonicalize_testcases(testcases, doc_structure)
+    
+    # Validate testcase quality
+    notify("생성된 Testcase의 품질을 검증합니다...")
+    validation_stats = {}
+    validated_testcases = validate_testcase_quality(testcases, model_option, api_keys,
+                                                    local_scoring=local_scoring, stats=validation_stats)
+    
+    return {
+        "testcases": validated_testcases,
+        "validation_stats": validation_stats,
+        "chunks": filtered_sentences,
+        "structure": doc_structure,
+        "taxonomy_stats": taxonomy_stats,
+        "provenance": build_provenance_index(validated_testcases, filtered_sentences)
+    }
+
+def show_validation_stats(stats):
+    # Display how many LLM validation calls the local scorer saved
+    cols = st.columns(4)
+    cols[0].metric("전체 Testcase", stats.get("total", 0))
+    cols[1].metric("AI 검증 호출", stats.get("llm_calls", 0))
+    cols[2].metric("생략된 AI 호출", stats.get("avoided_calls", 0))
+    if stats.get("agreement_sample"):
+        cols[3].metric(
+            f"로컬/AI 점수 일치율 (표본 {stats['agreement_sample']}개)",
+            f"{stats['within_10'] * 100:.0f}%",
+            help=f"±10점 이내 일치 비율, 평균 점수 차이 {stats['mean_abs_diff']:.1f}점"
+        )
+
+def show_results(testcases):
+    # Display testcase preview (filtered and paginated server-side)
+    st.subheader("Testcase 미리보기")
+    
+    filter_cols = st.columns(3)
+    majors = filter_cols[0].multiselect("대분류", sorted({tc.major for tc in testcases}))
+    kinds = filter_cols[1].multiselect("구분", sorted({tc.kind for tc in testcases}))
+    grades = filter_cols[2].multiselect("등급", GRADES)
+    
+    rows = filter_testcases(testcases, majors, kinds, grades)
+    
+    page_cols = st.columns(2)
+    page_size = page_cols[0].selectbox("페이지당 행 수", [50, 100, 200, 500], index=1)
+    total_pages = max(1, (len(rows) + page_size - 1) // page_size)
+    page = page_cols[1].number_input("페이지", min_value=1, max_value=total_pages, value=1, step=1)
+    
+    page_rows, total_pages = paginate_testcases(rows, int(page), page_size)
+    st.caption(f"전체 {len(testcases)}개 중 {len(rows)}개 일치 · {int(page)}/{total_pages} 페이지")
+    st.dataframe(pd.DataFrame(page_rows), hide_index=True)
+    
+    # Download button for the selected export format
+    export_format = st.selectbox("내보내기 형식", list(EXPORT_FORMATS.keys()))
+    writer, file_name, mime = EXPORT_FORMATS[export_format]
+    
+    exports = st.session_state.setdefault("exports", {})
+    if export_format not in exports:
+        try:
+            exports[export_format] = writer(testcases).getvalue()
+        except ImportError as e:
+            st.error(str(e))
+            return
+    
+    st.download_button(
+        label=f"Testcase 파일 다운로드 ({export_format})",
+        data=exports[export_format],
+        file_name=file_name,
+        mime=mime
+    )
+
+def show_regeneration(model_option, api_keys, local_scoring):
+    # Regenerate only the rows tied to a 대분류, page range or row set
+    run = st.session_state["run"]
+    testcases = st.session_state["testcases"]
+    
+    with st.expander("선택 영역 재생성"):
+        mode = st.radio("재생성 기준", ["대분류", "페이지 범위", "항목번호"], horizontal=True)
+        if mode == "대분류":
+            majors = st.multiselect("재생성할 대분류", sorted({tc.major for tc in testcases}))
+            rows = select_rows(testcases, majors=majors)
+        elif mode == "페이지 범위":
+            pages = sorted({page for tc in testcases for page in tc.pages})
+            if not pages:
+                st.info("페이지 정보가 있는 Testcase가 없습니다. (PDF 문서에서만 지원)")
+                return
+            if pages[0] == pages[-1]:
+                # st.slider rejects min_value == max_value, so a single page is selected as is
+                st.caption(f"모든 Testcase가 {pages[0]}페이지에서 생성되었습니다.")
+                page_range = (pages[0], pages[0])
+            else:
+                page_range = st.slider("페이지 범위", min_value=pages[0], max_value=pages[-1], value=(pages[0], pages[-1]))
+            rows = select_rows(testcases, page_range=page_range)
+        else:
+            row_text = st.text_input("항목번호 (예: 3, 5-8, 12)")
+            try:
+                rows = select_rows(testcases, rows=parse_row_numbers(row_text))
+            except ValueError:
+                st.error("항목번호 형식이 올바르지 않습니다.")
+                return
         
-        # Add score and grade with conditional formatting
-        score = tc["점수"]
-        ws.cell(row=row_idx, column=10, value=f"{score}점")
+        # Rows generated from the same source sentences are regenerated together
+        widened = expand_selection(testcases, rows)
+        shared = len(widened) - len(rows)
+        rows = widened
+        st.caption(
+            f"선택된 Testcase {len(rows)}개" + (f" (같은 출처 문장의 Testcase {shared}개 포함)" if shared else "")
+            + f" · 나머지 {len(testcases) - len(rows)}개는 그대로 유지됩니다. 재생성 후 항목번호가 다시 매겨집니다."
+        )
         
-        # Set grade based on score
-        if score >= 90:
-            grade = "🟢"
-        elif score >= 70:
-            grade = "🟡"
-        elif score >= 50:
-            grade = "🟠"
-        else:
-            grade = "🔴"
+        if rows and st.button("선택한 Testcase 재생성"):
+            regen_stats = {}
+            with st.spinner("선택한 Testcase를 재생성합니다..."):
+                try:
+                    testcases = regenerate_testcases(testcases, run["chunks"], run["structure"], rows,
+                                                     model_option, api_keys, local_scoring=local_scoring, stats=regen_stats)
+                except ValueError as e:
+                    st.error(str(e))
+                    return
+                if run["taxonomy_stats"]:
+                    testcases = canonicalize_testcases(testcases, run["structure"])
+            run["testcases"] = testcases
+            run["provenance"] = build_provenance_index(testcases, run["chunks"])
+            run["validation_stats"] = merge_validation_stats(run["validation_stats"], regen_stats, len(testcases))
+            st.session_state["testcases"] = testcases
+            st.session_state["validation_stats"] = run["validation_stats"]
+            st.session_state["exports"] = {}
+            st.rerun()
         
-        ws.cell(row=row_idx, column=11, value=grade)
-    
-    # Auto-adjust column widths
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        adjusted_width = max_length + 2
-        ws.column_dimensions[column].width = adjusted_width
-    
-    # Save to BytesIO object
-    excel_file = BytesIO()
-    wb.save(excel_file)
-    excel_file.seek(0)
-    
-    return excel_file
+        st.download_button(
+            label="출처 인덱스 다운로드 (JSON)",
+            data=provenance_to_json(run["provenance"]),
+            file_name="testcase_provenance.json",
+            mime="application/json"
+        )
 
 def main():
     st.title("게임 기획서 → Testcase 자동 생성기")
@@ -157,60 +291,41 @@ def main():
         if openai_api:
             api_keys["openai"] = openai_api
     
+    project = st.sidebar.text_input("프로젝트 이름 (입력 시 분류체계를 저장/재사용)").strip()
+    
+    local_scoring = st.sidebar.checkbox("로컬 사전 채점 사용 (명확한 Testcase는 AI 검증 생략)", value=True)
+    
     # File uploader
     uploaded_file = st.file_uploader("기획서(DOCX, PDF)를 업로드해주세요", type=['docx', 'pdf'])
     
     if uploaded_file and api_keys:
-        with st.spinner("문서 분석 중입니다..."):
-            # Save uploaded file
-            temp_file_path = save_uploaded_file(uploaded_file)
-            
-            # Load document
-            documents = load_document(temp_file_path)
-            if not documents:
-                return
-            
-            # Split into sentences
-            st.info("문서를 문장 단위로 분할합니다...")
-            sentences = split_into_sentences(documents)
-            
-            # Filter unnecessary sentences
-            st.info("Testcase에 필요한 문장을 필터링합니다...")
-            filtered_sentences = filter_unnecessary_sentences(sentences, model_option, api_keys)
-            
-            # Identify document structure
-            st.info("문서 구조를 분석하여 대/중/소분류를 식별합니다...")
-            doc_structure = identify_document_structure(filtered_sentences, model_option, api_keys)
-            
-            # Generate testcases
-            st.info("Testcase를 생성합니다...")
-            testcases = generate_testcases(filtered_sentences, doc_structure, model_option, api_keys)
-            
-            # Validate testcase quality
-            st.info("생성된 Testcase의 품질을 검증합니다...")
-            validated_testcases = validate_testcase_quality(testcases, model_option, api_keys)
+        # Only rerun the pipeline for a new upload/model; widget changes reuse the cached result
+        # Keyed on the file content, so an edited spec with the same name and size is reprocessed
+        file_digest = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+        run_key = (file_digest, model_option, local_scoring, project)
+        if st.session_state.get("run_key") != run_key:
+            with st.spinner("문서 분석 중입니다..."):
+                # Save uploaded file
+                temp_file_path = save_uploaded_file(uploaded_file)
+                
+                run = run_pipeline(temp_file_path, model_option, api_keys, local_scoring, project=project or None)
+                if not run:
+                    return
+                
+                # Clean up temporary file
+                os.unlink(temp_file_path)
             
-            # Create Excel file
-            excel_file = create_excel_with_testcases(validated_testcases)
-            
-            # Display success message and download button
-            st.success("Testcase가 성공적으로 생성되었습니다!")
-            
-            # Display testcase preview
-            st.subheader("Testcase 미리보기")
-            preview_df = pd.DataFrame(validated_testcases)
-            st.dataframe(preview_df)
-            
-            # Download button
-            st.download_button(
-                label="Testcase 엑셀 파일 다운로드",
-                data=excel_file,
-                file_name="generated_testcases.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-            
-            # Clean up temporary file
-            os.unlink(temp_file_path)
+            st.session_state["run_key"] = run_key
+            st.session_state["run"] = run
+            st.session_state["testcases"] = run["testcases"]
+            st.session_state["validation_stats"] = run["validation_stats"]
+            st.session_state["exports"] = {}
+        
+        # Display success message
+        st.success("Testcase가 성공적으로 생성되었습니다!")
+        show_validation_stats(st.session_state["validation_stats"])
+        show_results(st.session_state["testcases"])
+        show_regeneration(model_option, api_keys, local_scoring)
     
     else:
         if not api_keys and uploaded_file:
@@ -0,0 +1,192 @@
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import csv
+import io
+import itertools
+import json
+from io import BytesIO
+from openpyxl import Workbook
+from openpyxl.styles import PatternFill, Font, Alignment
+from models import Testcase, testcase_columns
+
+# Column order shared by every export backend (matches templates/testcase_template.py)
+EXPORT_COLUMNS = ["항목번호", "대분류", "중분류", "소분류", "구분", "테스트 내용", "테스트 조건", "기대 결과", "비고", "점수", "등급"]
+
+PROVENANCE_COLUMNS = ["항목번호", "출처 청크", "페이지", "생성 배치"]
+
+GRADES = ["🟢", "🟡", "🟠", "🔴"]
+
+# Rows buffered per Parquet record batch
+PARQUET_BATCH_SIZE = 1000
+
+def score_to_grade(score):
+    # Set grade based on score
+    if score >= 90:
+        return "🟢"
+    elif score >= 70:
+        return "🟡"
+    elif score >= 50:
+        return "🟠"
+    else:
+        return "🔴"
+
+def testcase_row(idx: int, tc: Testcase) -> Dict[str, Any]:
+    score = tc.score or 0
+    return {
+        "항목번호": idx,
+        "대분류": tc.major,
+        "중분류": tc.medium,
+        "소분류": tc.minor,
+        "구분": tc.kind,
+        "테스트 내용": tc.content,
+        "테스트 조건": tc.condition,
+        "기대 결과": tc.expected,
+        "비고": tc.note,
+        "점수": score,
+        "등급": score_to_grade(score),
+    }
+
+def iter_testcase_rows(testcases: Iterable[Testcase]) -> Iterator[Dict[str, Any]]:
+    # Stream export rows one by one so no backend has to materialize the full result set
+    for idx, tc in enumerate(testcases, 1):
+        yield testcase_row(idx, tc)
+
+def create_excel_with_testcases(testcases):
+    # Create a new workbook and select the active worksheet
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Testcases"
+
+    # Set header style
+    header_fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
+    header_font = Font(bold=True)
+
+    # Write headers
+    for col_idx, header in enumerate(EXPORT_COLUMNS, 1):
+        cell = ws.cell(row=1, column=col_idx, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center')
+
+    # Provenance sheet so targeted regeneration can be traced from the workbook alone
+    provenance_ws = wb.create_sheet("Provenance")
+    provenance_ws.append(PROVENANCE_COLUMNS)
+    for cell in provenance_ws[1]:
+        cell.fill = header_fill
+        cell.font = header_font
+
+    # Write testcase data, tracking column widths as we go
+    max_lengths = [len(header) for header in EXPORT_COLUMNS]
+    for idx, tc in enumerate(testcases, 1):
+        row = testcase_row(idx, tc)
+        values = [row[column] for column in EXPORT_COLUMNS]
+        values[EXPORT_COLUMNS.index("점수")] = f"{row['점수']}점"
+        ws.append(values)
+        provenance_ws.append([idx, ", ".join(tc.chunk_ids), ", ".join(str(page) for page in tc.pages), tc.batch])
+        for col_idx, value in enumerate(values):
+            if value:
+                max_lengths[col_idx] = max(max_lengths[col_idx], len(str(value)))
+
+    # Auto-adjust column widths
+    for col, max_length in zip(ws.iter_cols(min_row=1, max_row=1), max_lengths):
+        ws.column_dimensions[col[0].column_letter].width = max_length + 2
+
+    # Save to BytesIO object
+    excel_file = BytesIO()
+    wb.save(excel_file)
+    excel_file.seek(0)
+
+    return excel_file
+
+def create_csv_with_testcases(testcases: Iterable[Testcase]) -> BytesIO:
+    csv_file = BytesIO()
+    # utf-8-sig so Excel opens Korean headers correctly
+    text_stream = io.TextIOWrapper(csv_file, encoding="utf-8-sig", newline="")
+    writer = csv.DictWriter(text_stream, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for row in iter_testcase_rows(testcases):
+        writer.writerow(row)
+    text_stream.flush()
+    text_stream.detach()
+    csv_file.seek(0)
+    return csv_file
+
+def create_jsonl_with_testcases(testcases: Iterable[Testcase]) -> BytesIO:
+    jsonl_file = BytesIO()
+    for row in iter_testcase_rows(testcases):
+        jsonl_file.write(json.dumps(row, ensure_ascii=False).encode("utf-8"))
+        jsonl_file.write(b"\n")
+    jsonl_file.seek(0)
+    return jsonl_file
+
+def create_parquet_with_testcases(testcases: Iterable[Testcase], batch_size: int = PARQUET_BATCH_SIZE) -> BytesIO:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet 내보내기에는 pyarrow 패키지가 필요합니다. (pip install pyarrow)")
+
+    schema = pa.schema([
+        (column, pa.int64() if column in ("항목번호", "점수") else pa.string())
+        for column in EXPORT_COLUMNS
+    ])
+
+    parquet_file = BytesIO()
+    writer = pq.ParquetWriter(parquet_file, schema)
+
+    # Write fixed-size columnar record batches instead of building one big table
+    testcases = iter(testcases)
+    start = 1
+    while True:
+        batch = list(itertools.islice(testcases, batch_size))
+        if not batch:
+            break
+        columns = testcase_columns(batch)
+        columns["점수"] = [score or 0 for score in columns["점수"]]
+        columns["항목번호"] = list(range(start, start + len(batch)))
+        columns["등급"] = [score_to_grade(score) for score in columns["점수"]]
+        writer.write_batch(pa.record_batch([columns[column] for column in EXPORT_COLUMNS], schema=schema))
+        start += len(batch)
+
+    writer.close()
+    parquet_file.seek(0)
+    return parquet_file
+
+# Export backends offered in the UI: label -> (writer, file name, mime type)
+EXPORT_FORMATS = {
+    "Excel (.xlsx)": (create_excel_with_testcases, "generated_testcases.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV (.csv)": (create_csv_with_testcases, "generated_testcases.csv", "text/csv"),
+    "JSON Lines (.jsonl)": (create_jsonl_with_testcases, "generated_testcases.jsonl", "application/x-ndjson"),
+    "Parquet (.parquet)": (create_parquet_with_testcases, "generated_testcases.parquet", "application/vnd.apache.parquet"),
+}
+
+# Function to filter testcases for the preview by 대분류/구분/등급
+def filter_testcases(testcases: List[Testcase],
+                     majors: Optional[List[str]] = None,
+                     kinds: Optional[List[str]] = None,
+                     grades: Optional[List[str]] = None) -> List[Tuple[int, Testcase]]:
+    # Keep the original 항목번호 so filtered rows still match the exported files
+    selected = []
+    for idx, tc in enumerate(testcases, 1):
+        if majors and tc.major not in majors:
+            continue
+        if kinds and tc.kind not in kinds:
+            continue
+        if grades and score_to_grade(tc.score or 0) not in grades:
+            continue
+        selected.append((idx, tc))
+    return selected
+
+# Function to slice one preview page so only that page is sent to the browser
+def paginate_testcases(rows: List[Tuple[int, Testcase]], page: int, page_size: int) -> Tuple[List[Dict[str, Any]], int]:
+    total_pages = max(1, (len(rows) + page_size - 1) // page_size)
+    page = min(max(page, 1), total_pages)
+    start = (page - 1) * page_size
+
+    page_rows = []
+    for idx, tc in rows[start:start + page_size]:
+        row = {"항목번호": idx}
+        row.update(tc.to_dict())
+        row["등급"] = score_to_grade(tc.score or 0)
+        page_rows.append(row)
+
+    return page_rows, total_pages
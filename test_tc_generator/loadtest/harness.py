@@ -0,0 +1,216 @@
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+
+# Run from the test_tc_generator directory: python -m loadtest.harness --users 20
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadtest.mock_llm_server import add_config_arguments, percentile
+from app import run_pipeline
+from exporters import create_excel_with_testcases
+from processor import GENERIC_CONTENT_PREFIX
+
+SAMPLE_SECTIONS = [
+    ("로그인", ["아이디와 비밀번호를 입력하고 로그인 버튼을 누르면 로비로 이동한다.", "비밀번호를 5회 연속 틀리면 10분간 로그인이 제한된다."]),
+    ("전투", ["스킬 사용 시 마나가 차감되며 마나가 부족하면 스킬 버튼이 비활성화된다.", "보스 체력이 30% 이하가 되면 광폭화 패턴이 시작된다."]),
+    ("상점", ["아이템 구매 시 보유 골드가 차감되고 인벤토리에 아이템이 추가된다.", "인벤토리가 가득 찬 경우 구매 버튼을 누르면 안내 팝업이 표시된다."]),
+    ("퀘스트", ["퀘스트 완료 시 보상 수령 버튼이 활성화된다.", "일일 퀘스트는 매일 오전 6시에 초기화된다."]),
+]
+
+def create_sample_document(path: str, pages: int = 8):
+    # Synthetic PDF spec with a repeated header/footer on every page, so the boilerplate stage is exercised too
+    import fitz
+
+    doc = fitz.open()
+    for page_no in range(pages):
+        title, lines = SAMPLE_SECTIONS[page_no % len(SAMPLE_SECTIONS)]
+        page = doc.new_page()
+        text = [
+            "MOCK 게임 기획서 v1.0",
+            "대외비 - 무단 배포 금지",
+            f"{page_no + 1}. {title} 시스템",
+            *[f"{line} (항목 {page_no + 1}-{idx + 1})" for idx, line in enumerate(lines)],
+            "Copyright MOCK Games. All rights reserved.",
+            f"Page {page_no + 1} / {pages}",
+        ]
+        for idx, line in enumerate(text):
+            page.insert_text((50, 60 + idx * 24), line, fontname="korea", fontsize=11)
+    doc.save(path)
+    doc.close()
+
+def run_user(user_id: int, runs: int, file_path: str, model_option: str, api_keys: Dict[str, str], local_scoring: bool,
+             project: Optional[str] = None) -> List[Dict[str, Any]]:
+    # One simulated user: uploads the same spec `runs` times in a row and downloads the workbook
+    results = []
+    for run_no in range(runs):
+        started = time.perf_counter()
+        result = {"user": user_id, "run": run_no, "ok": False}
+        try:
+            run = run_pipeline(file_path, model_option, api_keys, local_scoring, notify=lambda message: None, project=project)
+            if not run:
+                raise RuntimeError("document could not be loaded")
+            excel_file = create_excel_with_testcases(run["testcases"])
+            result.update({
+                "ok": True,
+                "testcases": len(run["testcases"]),
+                # Generic fallbacks mean a stage swallowed an LLM error and recovered locally
+                "fallback_testcases": sum(1 for tc in run["testcases"] if tc.content.startswith(GENERIC_CONTENT_PREFIX)),
+                "llm_validation_calls": run["validation_stats"].get("llm_calls", 0),
+                "excel_bytes": len(excel_file.getvalue()),
+            })
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"[:200]
+        result["seconds"] = time.perf_counter() - started
+        results.append(result)
+    return results
+
+def start_mock_server(args: argparse.Namespace) -> Tuple[subprocess.Popen, str]:
+    # Separate process, so its memory and JSON work are not counted against (or competing with) the pipeline
+    command = [
+        sys.executable, "-u", "-m", "loadtest.mock_llm_server", "--port", "0",
+        "--latency", args.latency, "--latency-ms", str(args.latency_ms), "--jitter", str(args.jitter),
+        "--error-429-rate", str(args.error_429_rate), "--error-500-rate", str(args.error_500_rate),
+        "--malformed-rate", str(args.malformed_rate),
+    ]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               stdout=subprocess.PIPE, text=True)
+    # The server prints its URL once it is listening
+    match = re.search(r"listening on (\S+)", process.stdout.readline())
+    if not match:
+        process.kill()
+        raise RuntimeError("mock LLM server did not start")
+    return process, match.group(1)
+
+def fetch_server_stats(url: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(f"{url}/stats") as response:
+        return json.load(response)
+
+def measure_memory(file_path: str, model_option: str, api_keys: Dict[str, str], local_scoring: bool,
+                   project: Optional[str] = None) -> int:
+    # One untimed run with tracemalloc on; tracing slows allocation, so it never overlaps the timed runs
+    tracemalloc.start()
+    try:
+        run_user(-1, 1, file_path, model_option, api_keys, local_scoring, project)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def summarize(results: List[Dict[str, Any]], wall_seconds: float, server_stats: Dict[str, Any], peak_traced_bytes: Optional[int]) -> Dict[str, Any]:
+    ok = [r for r in results if r["ok"]]
+    latencies = [r["seconds"] for r in ok]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if not r["ok"]:
+            name = r["error"].split(":", 1)[0]
+            errors[name] = errors.get(name, 0) + 1
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+    return {
+        "runs": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "errors": errors,
+        "wall_seconds": wall_seconds,
+        "throughput_runs_per_min": len(ok) / wall_seconds * 60 if wall_seconds else 0.0,
+        "run_seconds_p50": percentile(latencies, 50),
+        "run_seconds_p95": percentile(latencies, 95),
+        "run_seconds_p99": percentile(latencies, 99),
+        "run_seconds_max": max(latencies) if latencies else 0.0,
+        "testcases_total": sum(r["testcases"] for r in ok),
+        "fallback_testcases": sum(r["fallback_testcases"] for r in ok),
+        "llm_validation_calls": sum(r["llm_validation_calls"] for r in ok),
+        # From a separate single-run pass (--trace-memory); None when not measured
+        "peak_traced_memory_mb": peak_traced_bytes / (1024 * 1024) if peak_traced_bytes is not None else None,
+        "max_rss_mb": max_rss_mb,
+        "mock_server": server_stats,
+    }
+
+def print_report(report: Dict[str, Any]):
+    server = report["mock_server"]
+    print("\n📊 Load test report")
+    print(f"  runs              : {report['succeeded']}/{report['runs']} succeeded in {report['wall_seconds']:.1f}s")
+    print(f"  throughput        : {report['throughput_runs_per_min']:.2f} runs/min")
+    print(f"  run latency       : p50 {report['run_seconds_p50']:.2f}s · p95 {report['run_seconds_p95']:.2f}s · p99 {report['run_seconds_p99']:.2f}s · max {report['run_seconds_max']:.2f}s")
+    print(f"  failures          : {report['errors'] or '없음'}")
+    print(f"  testcases         : {report['testcases_total']} total, {report['fallback_testcases']} generic fallbacks")
+    traced = report["peak_traced_memory_mb"]
+    traced_text = f"peak traced {traced:.1f} MB per run (separate untimed pass)" if traced is not None else "tracing off (--trace-memory)"
+    print(f"  memory            : {traced_text} · max RSS {report['max_rss_mb']:.1f} MB (harness process, mock server excluded)")
+    print(f"  mock requests     : {server['requests']} {server['responses']} · malformed {server['malformed']}")
+    print(f"  mock by stage     : {server['by_kind']}")
+    print(f"  mock tokens       : {server['prompt_tokens']} prompt + {server['completion_tokens']} completion")
+    print(f"  mock latency      : p50 {server['latency_ms_p50']:.0f}ms · p95 {server['latency_ms_p95']:.0f}ms · p99 {server['latency_ms_p99']:.0f}ms")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Drive the full testcase pipeline against a local mock LLM server")
+    parser.add_argument("--users", type=int, default=10, help="concurrent simulated users")
+    parser.add_argument("--runs-per-user", type=int, default=1)
+    parser.add_argument("--provider", choices=["openai", "gemini"], default="openai")
+    parser.add_argument("--document", help="PDF/DOCX spec to upload (default: generated sample PDF)")
+    parser.add_argument("--pages", type=int, default=8, help="pages in the generated sample PDF")
+    parser.add_argument("--no-local-scoring", action="store_true", help="send every testcase to the model for validation")
+    parser.add_argument("--project", help="reuse/update this project taxonomy (see taxonomy.py)")
+    parser.add_argument("--trace-memory", action="store_true", help="measure peak traced memory in an extra untimed run")
+    parser.add_argument("--json", help="also write the report to this path")
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server, server_url = start_mock_server(args)
+
+    try:
+        # Both SDKs read these at client construction time
+        os.environ["OPENAI_BASE_URL"] = f"{server_url}/v1"
+        os.environ["GEMINI_API_ENDPOINT"] = server_url
+        if args.provider == "openai":
+            model_option, api_keys = "GPT-4 Turbo", {"openai": "mock-key"}
+        else:
+            model_option, api_keys = "Gemini 2.0 Flash", {"gemini": "mock-key"}
+
+        document = args.document
+        if not document:
+            document = os.path.join(tempfile.mkdtemp(), "sample_spec.pdf")
+            create_sample_document(document, args.pages)
+
+        print(f"🚀 {args.users} users × {args.runs_per_user} runs against {server_url} ({model_option})")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            futures = [
+                pool.submit(run_user, user_id, args.runs_per_user, document, model_option, api_keys, not args.no_local_scoring, args.project)
+                for user_id in range(args.users)
+            ]
+            results = [result for future in futures for result in future.result()]
+        wall_seconds = time.perf_counter() - started
+        # Snapshot before the memory pass so request counts cover the timed runs only
+        server_stats = fetch_server_stats(server_url)
+
+        peak_traced = None
+        if args.trace_memory:
+            peak_traced = measure_memory(document, model_option, api_keys, not args.no_local_scoring, args.project)
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = summarize(results, wall_seconds, server_stats, peak_traced)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"report": report, "runs": results}, f, ensure_ascii=False, indent=2)
+        print(f"✅ Report written to: {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+
+# Local stand-in for the OpenAI chat completions API and the Gemini generateContent REST API.
+# Point the app at it with OPENAI_BASE_URL=http://host:port/v1 or GEMINI_API_ENDPOINT=http://host:port
+
+@dataclass
+class MockLLMConfig:
+    # Latency distribution: "fixed", "uniform" (mean ± jitter) or "lognormal" (median, sigma=jitter)
+    latency: str = "lognormal"
+    latency_ms: float = 300.0
+    jitter: float = 0.5
+    error_429_rate: float = 0.0
+    error_500_rate: float = 0.0
+    malformed_rate: float = 0.0
+    testcases_per_request: int = 3
+    seed: Optional[int] = None
+
+@dataclass
+class MockLLMStats:
+    requests: int = 0
+    responses: Dict[int, int] = field(default_factory=dict)
+    malformed: int = 0
+    by_kind: Dict[str, int] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latencies_ms: List[float] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "responses": {str(status): count for status, count in sorted(self.responses.items())},
+            "malformed": self.malformed,
+            "by_kind": dict(self.by_kind),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "latency_ms_p50": percentile(self.latencies_ms, 50),
+            "latency_ms_p95": percentile(self.latencies_ms, 95),
+            "latency_ms_p99": percentile(self.latencies_ms, 99),
+        }
+
+def percentile(values: List[float], pct: float) -> float:
+    # Nearest-rank percentile; 0.0 for an empty list
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def estimate_tokens(text: str) -> int:
+    # Rough count (~4 characters per token); good enough for relative comparisons between runs
+    return max(1, math.ceil(len(text) / 4))
+
+def classify_prompt(prompt: str) -> str:
+    # Match the prompts built in processor.py
+    if "유용한지" in prompt:
+        return "filter"
+    if "대분류/중분류/소분류 체계" in prompt:
+        return "structure"
+    if "품질을 평가" in prompt:
+        return "validate"
+    if "테스트케이스를 생성" in prompt:
+        return "generate"
+    return "other"
+
+def fake_completion(kind: str, rng: random.Random, config: MockLLMConfig, prompt: str = "") -> str:
+    if kind == "filter":
+        return "예" if rng.random() < 0.8 else "아니오"
+    if kind == "structure":
+        return json.dumps({
+            "대분류": ["시스템", "게임플레이", "UI"],
+            "중분류": {"시스템": ["로그인", "설정"], "게임플레이": ["전투", "퀘스트"], "UI": ["메뉴", "HUD"]},
+            "소분류": {"로그인": ["성공", "실패"], "전투": ["공격", "스킬"], "메뉴": ["진입", "종료"]},
+        }, ensure_ascii=False)
+    if kind == "generate":
+        # Cite one of the numbered "[n] ..." sentences in the batch, like a well-behaved model
+        sentences = len(re.findall(r"^\s*\[\d+\]", prompt, re.MULTILINE)) or 1
+        testcases = []
+        for _ in range(config.testcases_per_request):
+            major = rng.choice(["시스템", "게임플레이", "UI"])
+            testcases.append({
+                "대분류": major,
+                "중분류": rng.choice(["로그인", "전투", "메뉴"]),
+                "소분류": rng.choice(["성공", "실패", "진입"]),
+                "구분": rng.choice(["정상", "예외", "경계"]),
+                "테스트 내용": f"{major} 기능 {rng.randint(1, 9999)}번 동작 확인",
+                "테스트 조건": rng.choice(["로그인한 상태에서 버튼 클릭 시", "재화가 부족한 경우", "", "레벨 10 이상일 때"]),
+                "기대 결과": rng.choice(["결과 화면이 표시된다", "오류 메시지 출력", "", "재화가 차감됨"]),
+                "비고": "",
+                "출처": rng.randint(1, sentences),
+            })
+        return json.dumps({"testcases": testcases}, ensure_ascii=False)
+    if kind == "validate":
+        scores = {"정확성": rng.randint(15, 40), "명확성": rng.randint(8, 20), "중복성": rng.randint(8, 20), "완전성": rng.randint(8, 20)}
+        scores["총점"] = sum(scores.values())
+        return json.dumps(scores, ensure_ascii=False)
+    return "OK"
+
+class MockLLMServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[MockLLMConfig] = None):
+        self.config = config or MockLLMConfig()
+        self.stats = MockLLMStats()
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.config.seed)
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return self.stats.to_dict()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = MockLLMStats()
+
+    def _draw(self) -> Dict[str, Any]:
+        # All random decisions for one request, drawn under the lock so a seed gives reproducible runs
+        config = self.config
+        with self._lock:
+            if config.latency == "fixed":
+                delay_ms = config.latency_ms
+            elif config.latency == "uniform":
+                delay_ms = self._rng.uniform(config.latency_ms * (1 - config.jitter), config.latency_ms * (1 + config.jitter))
+            else:
+                delay_ms = self._rng.lognormvariate(math.log(max(config.latency_ms, 1.0)), config.jitter)
+            roll = self._rng.random()
+            if roll < config.error_429_rate:
+                status = 429
+            elif roll < config.error_429_rate + config.error_500_rate:
+                status = 500
+            else:
+                status = 200
+            return {
+                "delay_ms": max(0.0, delay_ms),
+                "status": status,
+                "malformed": self._rng.random() < config.malformed_rate,
+                "rng": random.Random(self._rng.random()),
+            }
+
+    def _record(self, kind: str, status: int, prompt: str, completion: str, malformed: bool, delay_ms: float):
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.responses[status] = self.stats.responses.get(status, 0) + 1
+            self.stats.by_kind[kind] = self.stats.by_kind.get(kind, 0) + 1
+            self.stats.latencies_ms.append(delay_ms)
+            if status == 200:
+                self.stats.prompt_tokens += estimate_tokens(prompt)
+                self.stats.completion_tokens += estimate_tokens(completion)
+                self.stats.malformed += 1 if malformed else 0
+
+    def handle(self, path: str, body: Dict[str, Any]):
+        # Returns (status, headers, payload) for an OpenAI- or Gemini-shaped request
+        gemini = ":generateContent" in path
+        if gemini:
+            prompt = "\n".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+        else:
+            prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+
+        kind = classify_prompt(prompt)
+        draw = self._draw()
+        time.sleep(draw["delay_ms"] / 1000)
+
+        if draw["status"] != 200:
+            self._record(kind, draw["status"], prompt, "", False, draw["delay_ms"])
+            message = "Rate limit exceeded" if draw["status"] == 429 else "Internal server error"
+            headers = {"Retry-After": "0"} if draw["status"] == 429 else {}
+            return draw["status"], headers, {"error": {"code": draw["status"], "message": message}}
+
+        completion = fake_completion(kind, draw["rng"], self.config, prompt)
+        if draw["malformed"]:
+            completion = completion[:max(1, len(completion) // 2)]
+        self._record(kind, 200, prompt, completion, draw["malformed"], draw["delay_ms"])
+
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(completion)
+        if gemini:
+            return 200, {}, {
+                "candidates": [{"content": {"parts": [{"text": completion}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+                "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": completion_tokens, "totalTokenCount": prompt_tokens + completion_tokens},
+            }
+        return 200, {}, {
+            "id": f"chatcmpl-mock-{self.stats.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": completion}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+def _make_handler(server: MockLLMServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self._send(200, server.snapshot_stats())
+            else:
+                self._send(404, {"error": {"code": 404, "message": "Not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send(400, {"error": {"code": 400, "message": "Invalid JSON body"}})
+                return
+            path = self.path.split("?", 1)[0]
+            if not (path.endswith("/chat/completions") or re.search(r"/models/[^/]+:generateContent$", path)):
+                self._send(404, {"error": {"code": 404, "message": "Not found"}})
+                return
+            status, headers, payload = server.handle(path, body)
+            self._send(status, payload, headers)
+
+        def log_message(self, format, *args):
+            # Keep load test output readable
+            pass
+
+    return Handler
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="mean (fixed/uniform) or median (lognormal) latency")
+    parser.add_argument("--jitter", type=float, default=0.5, help="uniform: ± fraction of the mean, lognormal: sigma")
+    parser.add_argument("--error-429-rate", type=float, default=0.0)
+    parser.add_argument("--error-500-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+
+def config_from_args(args: argparse.Namespace) -> MockLLMConfig:
+    return MockLLMConfig(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        jitter=args.jitter,
+        error_429_rate=args.error_429_rate,
+        error_500_rate=args.error_500_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI/Gemini server for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, config_from_args(args))
+    print(f"🚀 Mock LLM server listening on {server.url}")
+    print(f"   OPENAI_BASE_URL={server.url}/v1")
+    print(f"   GEMINI_API_ENDPOINT={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,120 @@
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from dataclasses import dataclass, replace, fields
+import sys
+
+# Record attribute -> Korean field name used in prompts, LLM responses and exports
+FIELD_LABELS = {
+    "major": "대분류",
+    "medium": "중분류",
+    "minor": "소분류",
+    "kind": "구분",
+    "content": "테스트 내용",
+    "condition": "테스트 조건",
+    "expected": "기대 결과",
+    "note": "비고",
+    "score": "점수",
+    "chunk_ids": "출처 청크",
+    "pages": "페이지",
+    "batch": "생성 배치",
+}
+
+TESTCASE_KINDS = ["정상", "예외", "경계"]
+
+# Loose spellings the models use for 구분
+_KIND_ALIASES = {
+    "normal": "정상", "positive": "정상", "성공": "정상",
+    "abnormal": "예외", "비정상": "예외", "exception": "예외", "negative": "예외", "error": "예외", "오류": "예외", "실패": "예외",
+    "boundary": "경계", "edge": "경계", "경계값": "경계",
+}
+
+# Substring fallbacks, checked in order so "비정상 입력" is not read as "정상"
+_KIND_KEYWORDS = [("비정상", "예외"), ("예외", "예외"), ("경계", "경계"), ("정상", "정상")]
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    return str(value).strip()
+
+def _normalize_kind(value: Any) -> str:
+    kind = _text(value)
+    if kind in TESTCASE_KINDS:
+        return kind
+    if kind.lower() in _KIND_ALIASES:
+        return _KIND_ALIASES[kind.lower()]
+    for keyword, known in _KIND_KEYWORDS:
+        if keyword in kind:
+            return known
+    # Keep unmapped values as-is so they stay visible (and lose the 구분 completeness points)
+    if kind:
+        print(f"Unrecognized 구분 value: {kind!r}")
+    return kind
+
+# Compact testcase record passed between the pipeline stages and exporters
+@dataclass(frozen=True, slots=True)
+class Testcase:
+    major: str
+    medium: str
+    minor: str
+    kind: str
+    content: str
+    condition: str
+    expected: str
+    note: str = ""
+    score: Optional[int] = None
+    # Provenance: source chunk IDs, 1-based source pages and the generation batch that produced the row
+    chunk_ids: Tuple[str, ...] = ()
+    pages: Tuple[int, ...] = ()
+    batch: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Testcase":
+        # Parse one Korean-keyed testcase from an LLM response; missing fields become empty strings
+        if not isinstance(data, dict):
+            raise ValueError(f"testcase must be a JSON object, got {type(data).__name__}")
+        content = _text(data.get("테스트 내용"))
+        if not content:
+            raise ValueError("testcase has no 테스트 내용")
+
+        score = data.get("점수")
+        return cls(
+            # Category strings repeat across thousands of rows, so share one copy of each
+            major=sys.intern(_text(data.get("대분류")) or "기타"),
+            medium=sys.intern(_text(data.get("중분류")) or "일반"),
+            minor=sys.intern(_text(data.get("소분류")) or "기본"),
+            kind=_normalize_kind(data.get("구분")),
+            content=content,
+            condition=_text(data.get("테스트 조건")),
+            expected=_text(data.get("기대 결과")),
+            note=_text(data.get("비고")),
+            score=int(score) if isinstance(score, (int, float)) else None,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {FIELD_LABELS[f.name]: getattr(self, f.name) for f in fields(self)}
+
+    def with_score(self, score: int) -> "Testcase":
+        return replace(self, score=int(score))
+
+    def with_provenance(self, chunk_ids: Iterable[str], pages: Iterable[int], batch: int) -> "Testcase":
+        return replace(self, chunk_ids=tuple(chunk_ids), pages=tuple(sorted(set(pages))), batch=batch)
+
+# Function to parse an LLM testcase list, dropping entries that fail validation
+def parse_testcases(items: Iterable[Any]) -> List[Testcase]:
+    testcases = []
+    for item in items:
+        if isinstance(item, Testcase):
+            testcases.append(item)
+            continue
+        try:
+            testcases.append(Testcase.from_dict(item))
+        except (ValueError, TypeError) as e:
+            print(f"Skipping invalid testcase: {e}")
+    return testcases
+
+# Function to transpose records into columns for batch (columnar) writers
+def testcase_columns(testcases: Iterable[Testcase]) -> Dict[str, List[Any]]:
+    columns = {label: [] for label in FIELD_LABELS.values()}
+    for tc in testcases:
+        for name, label in FIELD_LABELS.items():
+            columns[label].append(getattr(tc, name))
+    return columns
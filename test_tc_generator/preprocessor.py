@@ -0,0 +1,151 @@
+from typing import List, Dict, Tuple
+from collections import defaultdict
+import hashlib
+import math
+import re
+from langchain_core.documents import Document
+
+# A line is boilerplate if it recurs at the same position on at least this share of pages
+EDGE_LINE_PAGE_RATIO = 0.5
+# ... or anywhere on the page on at least this share of pages
+ANY_LINE_PAGE_RATIO = 0.8
+# Number of lines from the top/bottom of a page treated as header/footer area
+EDGE_LINES = 3
+# Fewer pages than this gives no reliable repetition signal
+MIN_PAGES = 3
+
+# Maximum simhash bit distance for two chunks to count as near-identical
+NEAR_DUPLICATE_DISTANCE = 6
+SIMHASH_BANDS = 8
+
+def normalize_text(text: str, fold_digits: bool = False) -> str:
+    # Page numbers, dates and revision numbers differ per page, so header/footer detection folds digits
+    if fold_digits:
+        text = re.sub(r"\d+", "#", text)
+    text = re.sub(r"[^\w#\s]", " ", text)
+    return " ".join(text.split()).lower()
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+def _line_positions(lines: List[str]) -> List[Tuple[str, ...]]:
+    # Position key per line: distance from the top and bottom edge (None in the page body).
+    # PyMuPDFLoader only gives page-level metadata (no block coordinates), so the position is the
+    # line's order within page_content rather than its y coordinate on the page
+    positions = []
+    for idx in range(len(lines)):
+        from_bottom = len(lines) - 1 - idx
+        if idx < EDGE_LINES:
+            positions.append(("top", idx))
+        elif from_bottom < EDGE_LINES:
+            positions.append(("bottom", from_bottom))
+        else:
+            positions.append(None)
+    return positions
+
+# Function to strip headers, footers and notices that repeat across PDF pages
+def remove_repeated_lines(documents: List[Document]) -> List[Document]:
+    # PyMuPDFLoader yields one Document per page with a "page" entry in its metadata
+    pages = [doc for doc in documents if "page" in doc.metadata]
+    if len(pages) < MIN_PAGES:
+        return documents
+
+    page_lines = {}
+    edge_counts = defaultdict(set)
+    any_counts = defaultdict(set)
+    for doc in pages:
+        lines = [line.strip() for line in doc.page_content.splitlines() if line.strip()]
+        normalized = [normalize_text(line, fold_digits=True) for line in lines]
+        for norm, position in zip(normalized, _line_positions(lines)):
+            page = doc.metadata["page"]
+            any_counts[norm].add(page)
+            if position is not None:
+                edge_counts[(norm, position)].add(page)
+        page_lines[id(doc)] = (lines, normalized)
+
+    page_count = len({doc.metadata["page"] for doc in pages})
+    edge_threshold = max(2, math.ceil(page_count * EDGE_LINE_PAGE_RATIO))
+    any_threshold = max(2, math.ceil(page_count * ANY_LINE_PAGE_RATIO))
+
+    cleaned = []
+    for doc in documents:
+        if "page" not in doc.metadata:
+            cleaned.append(doc)
+            continue
+        lines, normalized = page_lines[id(doc)]
+        kept = [
+            line for line, norm, position in zip(lines, normalized, _line_positions(lines))
+            if len(any_counts[norm]) < any_threshold
+            and (position is None or len(edge_counts[(norm, position)]) < edge_threshold)
+        ]
+        if kept:
+            cleaned.append(Document(page_content="\n".join(kept), metadata=doc.metadata))
+    return cleaned
+
+def _pages(doc: Document) -> List[int]:
+    pages = doc.metadata.get("pages")
+    if pages is not None:
+        return list(pages)
+    return [doc.metadata["page"]] if isinstance(doc.metadata.get("page"), int) else []
+
+def source_pages(doc: Document) -> List[int]:
+    # 1-based pages a chunk came from, including pages of collapsed duplicates
+    return [page + 1 for page in sorted(_pages(doc))]
+
+def _simhash(text: str) -> int:
+    # 64-bit simhash over character trigrams (works without word segmentation for Korean)
+    norm = normalize_text(text)
+    shingles = [norm[i:i + 3] for i in range(max(1, len(norm) - 2))]
+    weights = [0] * 64
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.md5(shingle.encode("utf-8")).digest()[:8], "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def _bands(fingerprint: int) -> List[Tuple[int, int]]:
+    # With at most NEAR_DUPLICATE_DISTANCE differing bits, at least one band matches exactly
+    width = 64 // SIMHASH_BANDS
+    return [(band, fingerprint >> (band * width) & ((1 << width) - 1)) for band in range(SIMHASH_BANDS)]
+
+# Function to collapse identical and near-identical chunks before any LLM stage
+def collapse_duplicate_chunks(sentences: List[Document]) -> List[Document]:
+    seen_hashes = {}
+    band_index = defaultdict(list)
+    kept = []
+    # 0-based PyMuPDF pages of every copy collapsed into each kept chunk
+    pages: Dict[int, set] = defaultdict(set)
+
+    for sentence in sentences:
+        digest = content_hash(sentence.page_content)
+        if digest in seen_hashes:
+            pages[seen_hashes[digest]].update(_pages(sentence))
+            continue
+
+        fingerprint = _simhash(sentence.page_content)
+        match = None
+        for band in _bands(fingerprint):
+            for idx, other in band_index[band]:
+                if bin(fingerprint ^ other).count("1") <= NEAR_DUPLICATE_DISTANCE:
+                    match = idx
+                    break
+            if match is not None:
+                break
+        if match is not None:
+            seen_hashes[digest] = match
+            pages[match].update(_pages(sentence))
+            continue
+
+        idx = len(kept)
+        seen_hashes[digest] = idx
+        pages[idx].update(_pages(sentence))
+        for band in _bands(fingerprint):
+            band_index[band].append((idx, fingerprint))
+        kept.append(sentence)
+
+    # Keep every page the text appeared on so page-range selection still finds it
+    return [
+        Document(page_content=sentence.page_content, metadata={**sentence.metadata, "pages": sorted(pages[idx])})
+        if len(pages[idx]) > 1 else sentence
+        for idx, sentence in enumerate(kept)
+    ]
@@ -1,14 +1,23 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import json
 import random
+import re
 import os
 import google.generativeai as genai
 from openai import OpenAI
 from langchain_core.documents import Document
+from models import Testcase, TESTCASE_KINDS, parse_testcases
+from preprocessor import source_pages
 
 # Configure API clients based on keys
 def configure_api_clients(model_option, api_keys):
     if "Gemini" in model_option and "gemini" in api_keys:
-        genai.configure(api_key=api_keys["gemini"])
+        # GEMINI_API_ENDPOINT points the REST transport at another host (e.g. loadtest/mock_llm_server.py)
+        gemini_endpoint = os.environ.get("GEMINI_API_ENDPOINT")
+        if gemini_endpoint:
+            genai.configure(api_key=api_keys["gemini"], transport="rest", client_options={"api_endpoint": gemini_endpoint})
+        else:
+            genai.configure(api_key=api_keys["gemini"])
         # Gemini 모델 매핑
         model_mapping = {
             "Gemini 2.5 Pro": "gemini-2.5-pro-exp-03-25",
@@ -89,7 +98,8 @@ def _check_if_useful_for_testcase(content: str, model_option: str, api_client: A
         return "예" in answer or "yes" in answer
 
 # Function to identify document structure (major/medium/minor categories)
-def identify_document_structure(filtered_sentences: List[Document], model_option: str, api_keys: Dict[str, str]) -> Dict[str, Any]:
+def identify_document_structure(filtered_sentences: List[Document], model_option: str, api_keys: Dict[str, str],
+                                known_structure: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
     api_client = configure_api_clients(model_option, api_keys)
     
     # Join all filtered sentences to get a complete document view
@@ -120,24 +130,49 @@ def identify_document_structure(filtered_sentences: List[Document], model_option
     
     JSON 형식으로만 응답해주세요.
     """
+    fallback = create_default_structure()
+    
+    # With a known project taxonomy, only ask for categories that are missing from it
+    if known_structure:
+        known_text = json.dumps(known_structure, ensure_ascii=False)
+        prompt = f"""
+    다음 게임 기획서 내용에서 기존 대분류/중분류/소분류 체계에 없는 새로운 분류만 식별해주세요.
+    기존 분류와 같은 의미의 분류는 기존 이름을 그대로 사용하고, 새로운 분류가 없으면 빈 목록으로 응답해주세요.
+    
+    기존 분류체계:
+    {known_text}
+    
+    응답 형식:
+    {{
+      "대분류": ["새 대분류", ...],
+      "중분류": {{"대분류명": ["새 중분류", ...]}},
+      "소분류": {{"중분류명": ["새 소분류", ...]}}
+    }}
+    
+    문서 내용:
+    {full_text}
+    
+    JSON 형식으로만 응답해주세요.
+    """
+        # A failed delta call must not look like "no new categories"
+        fallback = None
+    
     
     if api_client["client"] == "gemini":
         gemini_model = genai.GenerativeModel(api_client["model"])
         response = gemini_model.generate_content(prompt)
         
         try:
-            import json
-            from json import JSONDecodeError
             response_text = response.text
             json_match = re.search(r'({.*})', response_text, re.DOTALL)
             if json_match:
                 structure_json = json_match.group(1)
                 return json.loads(structure_json)
             else:
-                return create_default_structure()
+                return fallback
         except Exception as e:
             print(f"Error parsing document structure: {e}")
-            return create_default_structure()
+            return fallback
     else:
         try:
             response = api_client["client"].chat.completions.create(
@@ -149,12 +184,11 @@ def identify_document_structure(filtered_sentences: List[Document], model_option
                 response_format={"type": "json_object"}
             )
             
-            import json
             structure_text = response.choices[0].message.content
             return json.loads(structure_text)
         except Exception as e:
             print(f"Error getting document structure from OpenAI: {e}")
-            return create_default_structure()
+            return fallback
 
 def create_default_structure():
     # Default structure when AI fails to identify document structure
@@ -175,7 +209,8 @@ def create_default_structure():
     }
 
 # Function to generate testcases from filtered sentences
-def generate_testcases(filtered_sentences: List[Document], doc_structure: Dict[str, Any], model_option: str, api_keys: Dict[str, str]) -> List[Dict[str, Any]]:
+def generate_testcases(filtered_sentences: List[Document], doc_structure: Dict[str, Any], model_option: str, api_keys: Dict[str, str],
+                       first_batch: int = 0) -> List[Testcase]:
     api_client = configure_api_clients(model_option, api_keys)
     
     testcases = []
@@ -184,7 +219,9 @@ def generate_testcases(filtered_sentences: List[Document], doc_structure: Dict[s
     batch_size = 5
     for i in range(0, len(filtered_sentences), batch_size):
         batch = filtered_sentences[i:i+batch_size]
-        batch_text = "\n".join([s.page_content for s in batch])
+        batch_no = first_batch + i // batch_size
+        # Number the sentences so the model can cite the one each testcase comes from
+        batch_text = "\n".join([f"[{n}] {s.page_content}" for n, s in enumerate(batch, 1)])
         
         # Format structure for the prompt
         structure_text = f"""
@@ -212,7 +249,8 @@ def generate_testcases(filtered_sentences: List[Document], doc_structure: Dict[s
             "테스트 내용": "테스트할 기능이나 동작의 요약",
             "테스트 조건": "테스트를 수행하기 위한 전제 조건",
             "기대 결과": "테스트 성공 시 예상되는 결과",
-            "비고": "추가 참고사항"
+            "비고": "추가 참고사항",
+            "출처": "근거가 된 문장 번호 (예: 1 또는 1, 3)"
         }}
         
         분석할 기획서 내용:
@@ -229,9 +267,6 @@ def generate_testcases(filtered_sentences: List[Document], doc_structure: Dict[s
             response = gemini_model.generate_content(prompt)
             
             try:
-                import json
-                import re
-                
                 # Try to find and parse JSON content
                 response_text = response.text
                 
@@ -242,10 +277,10 @@ def generate_testcases(filtered_sentences: List[Document], doc_structure: Dict[s
                     batch_testcases = json.loads(json_str)
                 else:
                     # Fallback to create generic testcase
-                    batch_testcases = [create_generic_testcase(s.page_content, doc_structure) for s in batch]
+                    batch_testcases = _generic_batch(batch, doc_structure, batch_no)
             except Exception as e:
                 print(f"Error parsing testcases: {e}")
-                batch_testcases = [create_generic_testcase(s.page_content, doc_structure) for s in batch]
+                batch_testcases = _generic_batch(batch, doc_structure, batch_no)
         else:
             try:
                 response = api_client["client"].chat.completions.create(
@@ -257,11 +292,9 @@ def generate_testcases(filtered_sentences: List[Document], doc_structure: Dict[s
                     response_format={"type": "json_object"}
                 )
                 
-                import json
                 result_text = response.choices[0].message.content
                 
                 # Find JSON array in the response
-                import re
                 json_match = re.search(r'(\[.*\])', result_text, re.DOTALL)
                 if json_match:
                     json_str = json_match.group(1)
@@ -275,19 +308,49 @@ def generate_testcases(filtered_sentences: List[Document], doc_structure: Dict[s
                         elif "testcases" in result_obj:
                             batch_testcases = result_obj["testcases"]
                         else:
-                            batch_testcases = [create_generic_testcase(s.page_content, doc_structure) for s in batch]
+                            batch_testcases = _generic_batch(batch, doc_structure, batch_no)
                     except:
-                        batch_testcases = [create_generic_testcase(s.page_content, doc_structure) for s in batch]
+                        batch_testcases = _generic_batch(batch, doc_structure, batch_no)
                         
             except Exception as e:
                 print(f"Error getting testcases from OpenAI: {e}")
-                batch_testcases = [create_generic_testcase(s.page_content, doc_structure) for s in batch]
+                batch_testcases = _generic_batch(batch, doc_structure, batch_no)
         
-        testcases.extend(batch_testcases)
+        # Validate the raw JSON items into typed records, tagged with the chunk(s) they came from
+        parsed = []
+        for item in batch_testcases:
+            for tc in parse_testcases([item]):
+                if tc.batch is None:
+                    sources = _cited_sources(item, batch)
+                    tc = tc.with_provenance([s.metadata.get("chunk_id", "") for s in sources],
+                                            [page for s in sources for page in source_pages(s)], batch_no)
+                parsed.append(tc)
+        
+        # An empty array is a valid answer; only fall back when every returned item was rejected
+        if batch_testcases and not parsed:
+            parsed = _generic_batch(batch, doc_structure, batch_no)
+        
+        testcases.extend(parsed)
     
     return testcases
 
-def create_generic_testcase(sentence, doc_structure):
+def _cited_sources(item: Any, batch: List[Document]) -> List[Document]:
+    # Sentences cited in the item's "출처"; the whole batch if the model did not cite a valid one
+    cited = item.get("출처") if isinstance(item, dict) and item.get("출처") is not None else ""
+    sources = []
+    for number in map(int, re.findall(r"\d+", str(cited))):
+        if 1 <= number <= len(batch) and batch[number - 1] not in sources:
+            sources.append(batch[number - 1])
+    return sources or batch
+
+def _generic_batch(batch: List[Document], doc_structure: Dict[str, Any], batch_no: int) -> List[Testcase]:
+    # One placeholder per sentence, each tied to its own chunk
+    return [
+        create_generic_testcase(s.page_content, doc_structure).with_provenance([s.metadata.get("chunk_id", "")], source_pages(s), batch_no)
+        for s in batch
+    ]
+
+def create_generic_testcase(sentence, doc_structure) -> Testcase:
     # Fallback function to create a generic testcase when AI fails
     major_categories = doc_structure["대분류"]
     major = random.choice(major_categories)
@@ -300,101 +363,146 @@ def create_generic_testcase(sentence, doc_structure):
     
     tc_types = ["정상", "예외", "경계"]
     
+    return Testcase(
+        major=major,
+        medium=medium,
+        minor=minor,
+        kind=random.choice(tc_types),
+        content=f"{GENERIC_CONTENT_PREFIX} {sentence[:50]}...",
+        condition=GENERIC_CONDITION,
+        expected=GENERIC_RESULT
+    )
+
+# Placeholder texts used by create_generic_testcase; the local scorer treats them as missing
+GENERIC_CONTENT_PREFIX = "다음 내용 검증:"
+GENERIC_CONDITION = "기본 게임 환경에서 테스트"
+GENERIC_RESULT = "기획서 내용과 일치하는 결과 확인"
+
+# Local scores at or below/at or above these bounds are trusted without an LLM call
+LOCAL_SCORE_CLEAR_FAIL = 40
+LOCAL_SCORE_CLEAR_PASS = 90
+
+# Share of locally decided testcases also sent to the LLM to measure agreement (at least the minimum)
+AGREEMENT_SAMPLE_RATE = float(os.environ.get("TC_AGREEMENT_SAMPLE_RATE", "0.1"))
+AGREEMENT_SAMPLE_MIN = int(os.environ.get("TC_AGREEMENT_SAMPLE_MIN", "20"))
+
+ACTION_VERBS = ["확인", "검증", "입력", "선택", "클릭", "터치", "진입", "이동", "사용", "획득", "구매", "장착", "실행", "표시", "출력", "변경", "생성", "삭제", "저장", "전송", "발생"]
+# One-syllable markers ("시", "때", "후", "중", "됨") only count as separate words, so "시스템" or "중요" do not match
+CONDITION_MARKERS = re.compile(r"경우|상태|이상|이하|미만|초과|(?:^|\s)(?:시|때|후|중|동안)(?=$|[\s,.])")
+RESULT_MARKERS = re.compile(r"표시|출력|성공|실패|변경|증가|감소|된다|되어야|불가|노출|유지|지급|차감|됨(?=$|[\s,.])")
+
+def _is_filled(value: Any, placeholder: str = "") -> bool:
+    text = str(value or "").strip()
+    if not text or text in ("-", "없음"):
+        return False
+    if placeholder and text.startswith(placeholder):
+        return False
+    return True
+
+def _dedup_key(tc: Testcase) -> str:
+    return "|".join(" ".join(text.split()).lower() for text in (tc.content, tc.condition, tc.expected))
+
+# Function to score a testcase deterministically from its fields
+def score_testcase_locally(tc: Testcase, seen_keys: set = None) -> Dict[str, int]:
+    content = tc.content
+    condition = tc.condition
+    result = tc.expected
+
+    has_content = _is_filled(content, GENERIC_CONTENT_PREFIX)
+    has_condition = _is_filled(condition, GENERIC_CONDITION)
+    has_result = _is_filled(result, GENERIC_RESULT)
+
+    # 완전성 (20): required fields present and not placeholders
+    completeness = 5 * sum([has_content, has_condition, has_result])
+    completeness += 3 if all(_is_filled(value) for value in (tc.major, tc.medium, tc.minor)) else 0
+    completeness += 2 if tc.kind in TESTCASE_KINDS else 0
+
+    # 명확성 (20): reasonable length, concrete action verbs, no truncated text
+    clarity = 0
+    if has_content:
+        clarity += 8 if 10 <= len(content.strip()) <= 200 else 4
+    if any((has_content and verb in content) or (has_result and verb in result) for verb in ACTION_VERBS):
+        clarity += 8
+    if has_content and not content.rstrip().endswith("..."):
+        clarity += 4
+
+    # 정확성 (40): field presence alone is worth at most half; the rest needs a condition -> result pair,
+    # so a testcase without one can never reach LOCAL_SCORE_CLEAR_PASS and is left to the model
+    accuracy = 10 * sum([has_condition, has_result])
+    if has_condition and has_result and CONDITION_MARKERS.search(condition) and RESULT_MARKERS.search(result):
+        accuracy += 20
+
+    # 중복성 (20): exact repeats of an earlier testcase get no credit
+    uniqueness = 20
+    if seen_keys is not None:
+        key = _dedup_key(tc)
+        if key in seen_keys:
+            uniqueness = 0
+        seen_keys.add(key)
+
     return {
-        "대분류": major,
-        "중분류": medium,
-        "소분류": minor,
-        "구분": random.choice(tc_types),
-        "테스트 내용": f"다음 내용 검증: {sentence[:50]}...",
-        "테스트 조건": "기본 게임 환경에서 테스트",
-        "기대 결과": "기획서 내용과 일치하는 결과 확인",
-        "비고": ""
+        "정확성": accuracy,
+        "명확성": clarity,
+        "중복성": uniqueness,
+        "완전성": completeness,
+        "총점": accuracy + clarity + uniqueness + completeness
     }
 
-# Function to validate testcase quality
-def validate_testcase_quality(testcases: List[Dict[str, Any]], model_option: str, api_keys: Dict[str, str]) -> List[Dict[str, Any]]:
-    api_client = configure_api_clients(model_option, api_keys)
+def _is_clear_cut(tc: Testcase, local_score: Dict[str, int]) -> bool:
+    # A testcase without content or expected result is unusable no matter what the model says
+    if not _is_filled(tc.content, GENERIC_CONTENT_PREFIX) or not _is_filled(tc.expected, GENERIC_RESULT):
+        return True
+    return local_score["총점"] <= LOCAL_SCORE_CLEAR_FAIL or local_score["총점"] >= LOCAL_SCORE_CLEAR_PASS
+
+def _score_with_llm(tc: Testcase, api_client: Any) -> Dict[str, Any]:
+    # Format testcase for validation
+    tc_text = f"""
+    대분류: {tc.major}
+    중분류: {tc.medium}
+    소분류: {tc.minor}
+    구분: {tc.kind}
+    테스트 내용: {tc.content}
+    테스트 조건: {tc.condition}
+    기대 결과: {tc.expected}
+    비고: {tc.note}
+    """
     
-    validated_testcases = []
+    prompt = f"""
+    다음 테스트케이스의 품질을 평가해주세요. 각 항목별로 점수를 부여하고 총점을 계산해주세요.
     
-    for tc in testcases:
-        # Format testcase for validation
-        tc_text = f"""
-        대분류: {tc['대분류']}
-        중분류: {tc['중분류']}
-        소분류: {tc['소분류']}
-        구분: {tc['구분']}
-        테스트 내용: {tc['테스트 내용']}
-        테스트 조건: {tc['테스트 조건']}
-        기대 결과: {tc['기대 결과']}
-        비고: {tc['비고']}
-        """
-        
-        prompt = f"""
-        다음 테스트케이스의 품질을 평가해주세요. 각 항목별로 점수를 부여하고 총점을 계산해주세요.
-        
-        평가 항목:
-        1. 정확성 (40점): 테스트 내용이 명확하고 테스트 조건과 기대 결과가 정확하게 매칭되는가?
-        2. 명확성 (20점): 테스트케이스가 이해하기 쉽고 명확하게 작성되었는가?
-        3. 중복성 (20점): 다른 테스트케이스와 중복되지 않고 고유한 가치를 제공하는가?
-        4. 완전성 (20점): 테스트케이스가 필요한 모든 정보를 포함하고 있는가?
-        
-        테스트케이스:
-        {tc_text}
-        
-        각 항목의 점수와 총점(100점 만점)만 JSON 형식으로 응답해주세요:
-        {{
-            "정확성": 점수,
-            "명확성": 점수,
-            "중복성": 점수,
-            "완전성": 점수,
-            "총점": 총합점수
-        }}
-        """
-        
-        score_data = {"정확성": 30, "명확성": 15, "중복성": 15, "완전성": 15, "총점": 75}  # Default scores
+    평가 항목:
+    1. 정확성 (40점): 테스트 내용이 명확하고 테스트 조건과 기대 결과가 정확하게 매칭되는가?
+    2. 명확성 (20점): 테스트케이스가 이해하기 쉽고 명확하게 작성되었는가?
+    3. 중복성 (20점): 다른 테스트케이스와 중복되지 않고 고유한 가치를 제공하는가?
+    4. 완전성 (20점): 테스트케이스가 필요한 모든 정보를 포함하고 있는가?
+    
+    테스트케이스:
+    {tc_text}
+    
+    각 항목의 점수와 총점(100점 만점)만 JSON 형식으로 응답해주세요:
+    {{
+        "정확성": 점수,
+        "명확성": 점수,
+        "중복성": 점수,
+        "완전성": 점수,
+        "총점": 총합점수
+    }}
+    """
+    
+    score_data = {"정확성": 30, "명확성": 15, "중복성": 15, "완전성": 15, "총점": 75}  # Default scores
+    
+    if api_client["client"] == "gemini":
+        gemini_model = genai.GenerativeModel(api_client["model"])
+        response = gemini_model.generate_content(prompt)
         
-        if api_client["client"] == "gemini":
-            gemini_model = genai.GenerativeModel(api_client["model"])
-            response = gemini_model.generate_content(prompt)
+        try:
+            # Find JSON object in the response
+            response_text = response.text
+            json_match = re.search(r'({.*})', response_text, re.DOTALL)
             
-            try:
-                import json
-                import re
-                
-                # Find JSON object in the response
-                response_text = response.text
-                json_match = re.search(r'({.*})', response_text, re.DOTALL)
-                
-                if json_match:
-                    json_str = json_match.group(1)
-                    score_data = json.loads(json_str)
-                    
-                    # Verify total score
-                    total = sum([
-                        score_data.get("정확성", 0),
-                        score_data.get("명확성", 0),
-                        score_data.get("중복성", 0),
-                        score_data.get("완전성", 0)
-                    ])
-                    
-                    score_data["총점"] = total
-            except Exception as e:
-                print(f"Error parsing quality scores: {e}")
-        else:
-            try:
-                response = api_client["client"].chat.completions.create(
-                    model=api_client["model"],
-                    messages=[
-                        {"role": "system", "content": "테스트케이스의 품질을 평가합니다."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    response_format={"type": "json_object"}
-                )
-                
-                import json
-                score_text = response.choices[0].message.content
-                score_data = json.loads(score_text)
+            if json_match:
+                json_str = json_match.group(1)
+                score_data = json.loads(json_str)
                 
                 # Verify total score
                 total = sum([
@@ -405,12 +513,122 @@ def validate_testcase_quality(testcases: List[Dict[str, Any]], model_option: str
                 ])
                 
                 score_data["총점"] = total
-                
-            except Exception as e:
-                print(f"Error getting quality scores from OpenAI: {e}")
+        except Exception as e:
+            print(f"Error parsing quality scores: {e}")
+    else:
+        try:
+            response = api_client["client"].chat.completions.create(
+                model=api_client["model"],
+                messages=[
+                    {"role": "system", "content": "테스트케이스의 품질을 평가합니다."},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"}
+            )
+            
+            score_text = response.choices[0].message.content
+            score_data = json.loads(score_text)
+            
+            # Verify total score
+            total = sum([
+                score_data.get("정확성", 0),
+                score_data.get("명확성", 0),
+                score_data.get("중복성", 0),
+                score_data.get("완전성", 0)
+            ])
+            
+            score_data["총점"] = total
+            
+        except Exception as e:
+            print(f"Error getting quality scores from OpenAI: {e}")
+    
+    return score_data
+
+# Function to validate testcase quality
+def validate_testcase_quality(testcases: List[Testcase], model_option: str, api_keys: Dict[str, str],
+                              local_scoring: bool = True, stats: Dict[str, Any] = None, seen_keys: set = None,
+                              agreement_sample_size: int = None) -> List[Testcase]:
+    api_client = configure_api_clients(model_option, api_keys)
+    
+    validated_testcases = []
+    # seen_keys lets a partial rescore check duplicates against rows that were kept
+    seen_keys = set(seen_keys or ())
+    llm_calls = 0
+    locally_decided = []
+    
+    for tc in testcases:
+        local_score = score_testcase_locally(tc, seen_keys)
         
-        # Add score to the testcase
-        tc["점수"] = score_data["총점"]
-        validated_testcases.append(tc)
+        # Only testcases in the uncertain band go to the model
+        if local_scoring and _is_clear_cut(tc, local_score):
+            score_data = local_score
+            locally_decided.append((tc, local_score["총점"]))
+        else:
+            score_data = _score_with_llm(tc, api_client)
+            llm_calls += 1
+        
+        # Attach the score to a copy of the testcase
+        validated_testcases.append(tc.with_score(score_data["총점"]))
+    
+    # Spot-check a sample of local decisions against the model
+    if agreement_sample_size is None:
+        agreement_sample_size = max(AGREEMENT_SAMPLE_MIN, round(len(locally_decided) * AGREEMENT_SAMPLE_RATE))
+    agreement = []
+    for tc, local_total in random.sample(locally_decided, min(agreement_sample_size, len(locally_decided))):
+        llm_total = _score_with_llm(tc, api_client)["총점"]
+        llm_calls += 1
+        agreement.append((local_total, llm_total))
+    
+    if stats is not None:
+        stats["total"] = len(testcases)
+        stats["local"] = len(locally_decided)
+        stats["llm_calls"] = llm_calls
+        stats["avoided_calls"] = len(locally_decided) - len(agreement)
+        stats["agreement_sample"] = len(agreement)
+        if agreement:
+            stats["mean_abs_diff"] = sum(abs(l - m) for l, m in agreement) / len(agreement)
+            stats["within_10"] = sum(1 for l, m in agreement if abs(l - m) <= 10) / len(agreement)
     
     return validated_testcases
+
+# Function to regenerate and rescore only the selected rows, leaving the rest untouched
+def regenerate_testcases(testcases: List[Testcase], chunks: List[Document], doc_structure: Dict[str, Any], rows: List[int],
+                         model_option: str, api_keys: Dict[str, str], local_scoring: bool = True, stats: Dict[str, Any] = None) -> List[Testcase]:
+    # rows are 0-based positions already widened with provenance.expand_selection, so no kept row
+    # shares a source chunk with them (otherwise regenerating that chunk would duplicate it)
+    selected = set(rows)
+    if not selected:
+        return testcases
+    
+    chunk_ids = {chunk_id for idx in selected for chunk_id in testcases[idx].chunk_ids}
+    source_chunks = [c for c in chunks if c.metadata.get("chunk_id") in chunk_ids]
+    if not source_chunks:
+        raise ValueError("선택한 Testcase의 출처 문장을 찾을 수 없습니다.")
+    
+    kept = [tc for idx, tc in enumerate(testcases) if idx not in selected]
+    if any(chunk_ids.intersection(tc.chunk_ids) for tc in kept):
+        raise ValueError("선택 범위에 같은 출처 문장의 Testcase가 모두 포함되지 않았습니다.")
+    
+    next_batch = max((tc.batch for tc in testcases if tc.batch is not None), default=-1) + 1
+    regenerated = generate_testcases(source_chunks, doc_structure, model_option, api_keys, first_batch=next_batch)
+    regenerated = validate_testcase_quality(regenerated, model_option, api_keys, local_scoring=local_scoring, stats=stats,
+                                            seen_keys={_dedup_key(tc) for tc in kept})
+    
+    # Splice the new rows in where the first selected row was (항목번호 after it shift by the size difference)
+    insert_at = min(selected)
+    return kept[:insert_at] + regenerated + kept[insert_at:]
+
+# Function to fold the validation stats of a partial rescore into the run's stats
+def merge_validation_stats(base: Dict[str, Any], update: Dict[str, Any], total: int) -> Dict[str, Any]:
+    merged = dict(base)
+    merged["total"] = total
+    for key in ("local", "llm_calls", "avoided_calls"):
+        merged[key] = base.get(key, 0) + update.get(key, 0)
+    
+    # Agreement figures are sample-weighted averages
+    base_sample, update_sample = base.get("agreement_sample", 0), update.get("agreement_sample", 0)
+    merged["agreement_sample"] = base_sample + update_sample
+    if merged["agreement_sample"]:
+        for key in ("mean_abs_diff", "within_10"):
+            merged[key] = (base.get(key, 0) * base_sample + update.get(key, 0) * update_sample) / merged["agreement_sample"]
+    return merged
@@ -0,0 +1,84 @@
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import json
+from langchain_core.documents import Document
+from models import Testcase
+from preprocessor import content_hash, source_pages
+
+# Function to build the provenance index stored with a run (session state, workbook sheet, JSON export)
+def build_provenance_index(testcases: List[Testcase], chunks: List[Document]) -> Dict[str, Any]:
+    by_chunk: Dict[str, List[int]] = {}
+    by_page: Dict[int, List[int]] = {}
+    by_major: Dict[str, List[int]] = {}
+    by_batch: Dict[int, List[int]] = {}
+    for row, tc in enumerate(testcases, 1):
+        for chunk_id in tc.chunk_ids:
+            by_chunk.setdefault(chunk_id, []).append(row)
+        for page in tc.pages:
+            by_page.setdefault(page, []).append(row)
+        by_major.setdefault(tc.major, []).append(row)
+        if tc.batch is not None:
+            by_batch.setdefault(tc.batch, []).append(row)
+
+    return {
+        "chunks": {
+            chunk.metadata["chunk_id"]: {
+                "pages": source_pages(chunk),
+                "hash": content_hash(chunk.page_content),
+            }
+            for chunk in chunks if "chunk_id" in chunk.metadata
+        },
+        "rows": [
+            {"항목번호": row, "chunk_ids": list(tc.chunk_ids), "pages": list(tc.pages), "batch": tc.batch}
+            for row, tc in enumerate(testcases, 1)
+        ],
+        # 항목번호 lists keyed by chunk, page, 대분류 and batch
+        "by_chunk": by_chunk,
+        "by_page": {str(page): rows for page, rows in sorted(by_page.items())},
+        "by_major": by_major,
+        "by_batch": {str(batch): rows for batch, rows in sorted(by_batch.items())},
+    }
+
+def provenance_to_json(index: Dict[str, Any]) -> bytes:
+    return json.dumps(index, ensure_ascii=False, indent=2).encode("utf-8")
+
+# Function to pick the rows a reviewer wants regenerated (0-based positions)
+def select_rows(testcases: List[Testcase],
+                majors: Optional[Iterable[str]] = None,
+                page_range: Optional[Tuple[int, int]] = None,
+                rows: Optional[Iterable[int]] = None) -> List[int]:
+    # Criteria combine with OR; rows are 1-based 항목번호 as shown in the preview and exports
+    majors = set(majors or [])
+    wanted_rows = {row - 1 for row in (rows or [])}
+    selected = []
+    for idx, tc in enumerate(testcases):
+        if idx in wanted_rows or tc.major in majors:
+            selected.append(idx)
+        elif page_range and any(page_range[0] <= page <= page_range[1] for page in tc.pages):
+            selected.append(idx)
+    return selected
+
+# Function to widen a selection to every row generated from the same source chunks
+def expand_selection(testcases: List[Testcase], rows: Iterable[int]) -> List[int]:
+    # Regenerating a chunk replaces all of its rows, so rows linked through shared chunks must be
+    # selected together; grow the selection until it is closed (0-based positions)
+    selected = set(rows)
+    chunk_ids = {chunk_id for idx in selected for chunk_id in testcases[idx].chunk_ids}
+    while True:
+        linked = {idx for idx, tc in enumerate(testcases) if idx not in selected and chunk_ids.intersection(tc.chunk_ids)}
+        if not linked:
+            return sorted(selected)
+        selected |= linked
+        chunk_ids.update(chunk_id for idx in linked for chunk_id in testcases[idx].chunk_ids)
+
+def parse_row_numbers(text: str) -> List[int]:
+    # "3, 5-8, 12" -> [3, 5, 6, 7, 8, 12]
+    rows = []
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            rows.extend(range(int(start), int(end) + 1))
+        else:
+            rows.append(int(part))
+    return rows
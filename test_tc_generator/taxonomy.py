@@ -0,0 +1,191 @@
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import replace
+from datetime import datetime
+import difflib
+import json
+import os
+import re
+import tempfile
+import threading
+from langchain_core.documents import Document
+from models import Testcase
+from preprocessor import content_hash
+from processor import identify_document_structure, create_default_structure
+
+# Per-project taxonomy files live here (override with TC_TAXONOMY_DIR)
+TAXONOMY_DIR = os.environ.get("TC_TAXONOMY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "taxonomies"))
+
+# Minimum difflib ratio between normalized names to treat two categories as the same
+CATEGORY_MATCH_CUTOFF = 0.85
+
+# Serializes the reload-merge-save step between concurrent runs in this process
+_TAXONOMY_LOCK = threading.Lock()
+
+def _project_path(project: str) -> str:
+    slug = re.sub(r"[^\w-]+", "_", project.strip()).strip("_") or "default"
+    return os.path.join(TAXONOMY_DIR, f"{slug}.json")
+
+def load_taxonomy(project: str) -> Optional[Dict[str, Any]]:
+    path = _project_path(project)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error loading taxonomy for {project}: {e}")
+        return None
+
+def save_taxonomy(project: str, taxonomy: Dict[str, Any]):
+    # Write to a temp file and rename so concurrent runs never read a half-written file
+    os.makedirs(TAXONOMY_DIR, exist_ok=True)
+    path = _project_path(project)
+    taxonomy = {**taxonomy, "project": project, "updated_at": datetime.now().isoformat(timespec="seconds")}
+    fd, tmp_path = tempfile.mkstemp(dir=TAXONOMY_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(taxonomy, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def normalize_category(name: str) -> str:
+    # "캐릭터 생성", "캐릭터생성" and "캐릭터-생성" all normalize to the same key
+    return re.sub(r"[\W_]+", "", str(name)).lower()
+
+def match_category(name: str, candidates: List[str], cutoff: float = CATEGORY_MATCH_CUTOFF) -> Optional[str]:
+    # Return the existing name that `name` refers to, if any
+    key = normalize_category(name)
+    if not key:
+        return None
+    normalized = {normalize_category(candidate): candidate for candidate in candidates}
+    if key in normalized:
+        return normalized[key]
+    # "레벨 10" and "레벨 20" are different categories however similar the rest is
+    digits = re.findall(r"\d+", key)
+    similar = [candidate for candidate in normalized if re.findall(r"\d+", candidate) == digits]
+    best = difflib.get_close_matches(key, similar, n=1, cutoff=cutoff)
+    return normalized[best[0]] if best else None
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return []
+
+def _as_mapping(value: Any) -> Dict[str, List[str]]:
+    if not isinstance(value, dict):
+        return {}
+    return {str(key).strip(): _as_list(items) for key, items in value.items() if str(key).strip()}
+
+def _merge_names(existing: List[str], incoming: List[str], aliases: Dict[str, str]) -> int:
+    # Append names that do not fuzzy-match an existing one; record incoming -> canonical aliases
+    added = 0
+    for name in incoming:
+        canonical = match_category(name, existing)
+        if canonical is None:
+            existing.append(name)
+            canonical = name
+            added += 1
+        aliases[name] = canonical
+    return added
+
+# Function to merge newly discovered categories into the project taxonomy
+def merge_structure(base: Dict[str, Any], new: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    merged = {
+        "대분류": list(_as_list(base.get("대분류"))),
+        "중분류": {key: list(items) for key, items in _as_mapping(base.get("중분류")).items()},
+        "소분류": {key: list(items) for key, items in _as_mapping(base.get("소분류")).items()},
+    }
+    major_aliases: Dict[str, str] = {}
+    medium_aliases: Dict[str, str] = {}
+
+    added = _merge_names(merged["대분류"], _as_list(new.get("대분류")), major_aliases)
+
+    for major, mediums in _as_mapping(new.get("중분류")).items():
+        major = major_aliases.get(major) or match_category(major, merged["대분류"]) or major
+        if major not in merged["대분류"]:
+            merged["대분류"].append(major)
+            added += 1
+        all_mediums = [medium for items in merged["중분류"].values() for medium in items]
+        for medium in mediums:
+            # A 중분류 already filed under another 대분류 keeps its place
+            canonical = match_category(medium, all_mediums)
+            if canonical is None:
+                merged["중분류"].setdefault(major, []).append(medium)
+                all_mediums.append(medium)
+                canonical = medium
+                added += 1
+            medium_aliases[medium] = canonical
+
+    for medium, minors in _as_mapping(new.get("소분류")).items():
+        all_mediums = [item for items in merged["중분류"].values() for item in items]
+        medium = medium_aliases.get(medium) or match_category(medium, all_mediums + list(merged["소분류"])) or medium
+        added += _merge_names(merged["소분류"].setdefault(medium, []), minors, {})
+
+    return merged, added
+
+# Function to rename generated categories to the project's existing spelling
+def canonicalize_testcases(testcases: List[Testcase], structure: Dict[str, Any]) -> List[Testcase]:
+    majors = _as_list(structure.get("대분류"))
+    mediums = [item for items in _as_mapping(structure.get("중분류")).values() for item in items]
+    minors = [item for items in _as_mapping(structure.get("소분류")).values() for item in items]
+
+    # Only a handful of distinct names repeat across all rows, so match each one once
+    matches: Dict[Tuple[str, str], str] = {}
+    def resolve(level: str, name: str, candidates: List[str]) -> str:
+        if (level, name) not in matches:
+            matches[(level, name)] = match_category(name, candidates) or name
+        return matches[(level, name)]
+
+    canonical = []
+    for tc in testcases:
+        canonical.append(replace(
+            tc,
+            major=resolve("대분류", tc.major, majors),
+            medium=resolve("중분류", tc.medium, mediums),
+            minor=resolve("소분류", tc.minor, minors),
+        ))
+    return canonical
+
+# Function to fold a run's result into the latest saved taxonomy
+def _update_taxonomy(project: str, structure: Dict[str, Any], hashes: List[str]) -> Dict[str, Any]:
+    # Another run may have saved since we loaded, so merge into a fresh copy instead of overwriting it
+    with _TAXONOMY_LOCK:
+        latest = load_taxonomy(project) or {}
+        merged, _ = merge_structure(latest.get("structure", {}), structure)
+        seen = set(latest.get("seen_chunks", [])) | set(hashes)
+        save_taxonomy(project, {"structure": merged, "seen_chunks": sorted(seen)})
+    return merged
+
+# Function to get the document structure from the project taxonomy, asking the model only about unseen text
+def resolve_project_structure(project: str, filtered_sentences: List[Document], model_option: str, api_keys: Dict[str, str],
+                              stats: Dict[str, Any] = None) -> Dict[str, Any]:
+    taxonomy = load_taxonomy(project)
+    hashes = [content_hash(s.page_content) for s in filtered_sentences]
+
+    if not taxonomy:
+        structure = identify_document_structure(filtered_sentences, model_option, api_keys)
+        mode, new_count, added = "full", len(filtered_sentences), None
+        # Do not seed the project with the built-in fallback structure
+        if structure != create_default_structure():
+            structure, added = merge_structure({}, structure)
+            structure = _update_taxonomy(project, structure, hashes)
+    else:
+        seen = set(taxonomy.get("seen_chunks", []))
+        new_sentences = [s for s, h in zip(filtered_sentences, hashes) if h not in seen]
+        structure = taxonomy["structure"]
+        mode, new_count, added = "skipped", len(new_sentences), 0
+        if new_sentences:
+            delta = identify_document_structure(new_sentences, model_option, api_keys, known_structure=structure)
+            if isinstance(delta, dict):
+                structure, added = merge_structure(structure, delta)
+                structure = _update_taxonomy(project, structure, hashes)
+                mode = "delta"
+            else:
+                # Leave the new chunks unseen so the next run asks about them again
+                mode = "delta_failed"
+
+    if stats is not None:
+        stats["mode"] = mode
+        stats["new_chunks"] = new_count
+        stats["added_categories"] = added
+    return structure
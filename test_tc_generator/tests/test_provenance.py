@@ -0,0 +1,24 @@
+import os
+import sys
+
+# Run from the test_tc_generator directory: python -m pytest tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Testcase
+from provenance import expand_selection
+
+def _testcase(*chunk_ids):
+    return Testcase(major="시스템", medium="로그인", minor="성공", kind="정상", content=f"{'/'.join(chunk_ids)} 확인",
+                    condition="", expected="", chunk_ids=chunk_ids)
+
+def test_expand_selection_follows_shared_chunks_transitively():
+    # A=(c1), B=(c1,c2), C=(c2,c3), D=(c3), E=(c4)
+    testcases = [_testcase("c1"), _testcase("c1", "c2"), _testcase("c2", "c3"), _testcase("c3"), _testcase("c4")]
+    assert expand_selection(testcases, [0]) == [0, 1, 2, 3]
+    assert expand_selection(testcases, [3]) == [0, 1, 2, 3]
+    assert expand_selection(testcases, [4]) == [4]
+
+def test_expand_selection_is_closed():
+    testcases = [_testcase("c1"), _testcase("c1", "c2"), _testcase("c2", "c3"), _testcase("c3")]
+    rows = expand_selection(testcases, [0])
+    assert expand_selection(testcases, rows) == rows
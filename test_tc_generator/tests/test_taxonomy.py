@@ -0,0 +1,15 @@
+import os
+import sys
+
+# Run from the test_tc_generator directory: python -m pytest tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from taxonomy import match_category
+
+def test_match_category_merges_spelling_variants():
+    assert match_category("캐릭터 생성", ["캐릭터생성", "상점"]) == "캐릭터생성"
+
+def test_match_category_keeps_numbered_categories_apart():
+    assert match_category("던전 입장 레벨 20", ["던전 입장 레벨 10"]) is None
+    assert match_category("스킬 강화 2단계", ["스킬 강화 1단계"]) is None
+    assert match_category("스킬 강화 2 단계", ["스킬강화 2단계"]) == "스킬강화 2단계"